@@ -1,15 +1,12 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Header
 from pydantic import BaseModel
 from typing import Optional, List
-from jose import JWTError, jwt
-from pwdlib import PasswordHash
-from pwdlib.hashers.bcrypt import BcryptHasher
 from datetime import datetime, timedelta
 import json
 import os
 import logging
 from dotenv import load_dotenv
-from models import User, UserData, db
+from models import User, UserData, db, db_ready, get_password_hash
 
 load_dotenv()
 
@@ -24,8 +21,6 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 1 week
 # TODO: Implement refresh tokens to avoid silent logouts on expiry
 
-password_hash = PasswordHash((BcryptHasher(),))
-
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
 
@@ -40,7 +35,14 @@ class UserDataUpdate(BaseModel):
     alerts: Optional[List] = None
 
 
+def _require_db():
+    if not db_ready.is_set():
+        raise HTTPException(status_code=503, detail="Service is starting up, try again shortly")
+
+
 def create_access_token(data: dict):
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
@@ -52,6 +54,8 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Not authenticated")
 
+    from jose import JWTError, jwt
+
     token = authorization.split(" ")[1]
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -65,10 +69,11 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
 
 @router.post("/login")
 async def login(request: LoginRequest):
+    _require_db()
     username = request.username.lower()
     try:
         user = User.get(User.username == username)
-        if password_hash.verify(request.passcode[:72], user.passcode):
+        if get_password_hash().verify(request.passcode[:72], user.passcode):
             access_token = create_access_token(data={"sub": username})
 
             # Ensure UserData exists
@@ -102,6 +107,7 @@ async def login(request: LoginRequest):
 
 @router.get("/me")
 async def get_user_profile(username: str = Depends(get_current_user)):
+    _require_db()
     try:
         user = User.get(User.username == username)
         user_data, _ = UserData.get_or_create(user=user)
@@ -118,6 +124,7 @@ async def get_user_profile(username: str = Depends(get_current_user)):
 
 @router.post("/update-data")
 async def update_user_data(update: UserDataUpdate, username: str = Depends(get_current_user)):
+    _require_db()
     try:
         user = User.get(User.username == username)
         user_data, _ = UserData.get_or_create(user=user)
@@ -0,0 +1,223 @@
+"""Market-wide corporate events calendar.
+
+A daily background job fetches earnings dates, dividends and splits for the
+tracked symbols (hot stocks, watched peers and anything asked for via
+/api/calendar?symbols=) in chunked parallel batches and stores them in a
+date-sorted index, so range queries are a bisect in memory.
+"""
+from cachetools import TTLCache
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+import asyncio
+import logging
+import sector_index
+import upstream
+from upstream import Ticker
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# calendar_events + history: two Yahoo requests per symbol, sized to fit one rate-limit burst
+CHUNK_SIZE = upstream.batch_size(modules=2)
+MAX_PARALLEL_CHUNKS = 4
+REFRESH_INTERVAL = timedelta(days=1)
+CHECK_INTERVAL_SECONDS = 3600
+HISTORY_PERIOD = "1y"
+# A full rebuild with more failed chunks than this keeps the previous index
+MAX_FAILED_CHUNK_RATIO = 0.5
+
+# Parallel lists: dates[i] is the ISO date of events[i], both sorted by date.
+# "covered" holds the symbols whose events were fetched successfully.
+CALENDAR_INDEX = {
+    "dates": [],
+    "events": [],
+    "covered": set(),
+    "built_at": None
+}
+
+# Symbols requested through /api/calendar?symbols=, tracked for a week after the last ask
+REQUESTED_SYMBOLS = TTLCache(maxsize=500, ttl=7 * 24 * 3600)
+_wake = asyncio.Event()
+
+
+def _to_iso_date(value) -> Optional[str]:
+    """Normalise the assorted date shapes yahooquery returns to YYYY-MM-DD."""
+    if value is None:
+        return None
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value).strftime("%Y-%m-%d")
+    text = str(value)[:10]
+    try:
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        return None
+
+
+def _calendar_events(t, ns_syms: List[str], clean: dict) -> List[dict]:
+    events = []
+    cal = t.calendar_events
+    if not isinstance(cal, dict):
+        return events
+    for ns in ns_syms:
+        c = cal.get(ns)
+        if not isinstance(c, dict):
+            continue
+        earnings = c.get("earnings") or {}
+        for d in earnings.get("earningsDate") or []:
+            iso = _to_iso_date(d)
+            if iso:
+                events.append({
+                    "date": iso, "symbol": clean[ns], "type": "earnings",
+                    "eps_estimate": earnings.get("earningsAverage"),
+                    "revenue_estimate": earnings.get("revenueAverage")
+                })
+        iso = _to_iso_date(c.get("exDividendDate"))
+        if iso:
+            events.append({"date": iso, "symbol": clean[ns], "type": "ex_dividend"})
+    return events
+
+
+def _history_actions(t, clean: dict) -> List[dict]:
+    """Past dividends and splits from the daily history's action columns.
+
+    Yahoo reports Indian bonus issues as splits (a 1:1 bonus is a 2:1 split).
+    """
+    events = []
+    df = t.history(period=HISTORY_PERIOD, interval="1d")
+    if df is None or not hasattr(df, "reset_index") or df.empty:
+        return events
+    df = df.reset_index()
+    has_divs = "dividends" in df.columns
+    has_splits = "splits" in df.columns
+    if not (has_divs or has_splits):
+        return events
+    for _, row in df.iterrows():
+        sym = clean.get(row.get("symbol"))
+        iso = _to_iso_date(row.get("date"))
+        if not sym or not iso:
+            continue
+        if has_divs and row["dividends"] and row["dividends"] > 0:
+            events.append({"date": iso, "symbol": sym, "type": "dividend",
+                           "amount": round(float(row["dividends"]), 2)})
+        if has_splits and row["splits"] and row["splits"] > 0:
+            events.append({"date": iso, "symbol": sym, "type": "split",
+                           "ratio": float(row["splits"])})
+    return events
+
+
+def _fetch_chunk(symbols: List[str]) -> List[dict]:
+    ns_syms = [f"{s}.NS" for s in symbols]
+    clean = dict(zip(ns_syms, symbols))
+    t = Ticker(ns_syms)
+    # Errors propagate so the gateway's breaker and error counters see them
+    return _calendar_events(t, ns_syms, clean) + _history_actions(t, clean)
+
+
+async def build_calendar(symbols: Iterable[str], universe: Iterable[str], full: bool = True):
+    """Fetch events for symbols and merge them into the index.
+
+    Events already held for symbols in universe are kept unless this run
+    refreshed them, so a failed chunk never wipes known events. A full
+    rebuild where too many chunks fail leaves the index untouched.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    universe = set(universe)
+    sem = asyncio.Semaphore(MAX_PARALLEL_CHUNKS)
+
+    async def run(chunk):
+        async with sem:
+            return await upstream.call(
+                _fetch_chunk, chunk, priority=upstream.BACKGROUND, timeout=120,
+                cost=upstream.request_cost(chunk, modules=2)
+            )
+
+    chunks = [symbols[i:i + CHUNK_SIZE] for i in range(0, len(symbols), CHUNK_SIZE)]
+    results = await asyncio.gather(*(run(c) for c in chunks), return_exceptions=True)
+
+    fresh, refreshed, failed = [], set(), 0
+    for chunk, r in zip(chunks, results):
+        if isinstance(r, Exception):
+            failed += 1
+            logger.warning(f"Calendar chunk starting '{chunk[0]}' failed: {r}")
+        else:
+            fresh.extend(r)
+            refreshed.update(chunk)
+    if chunks and failed / len(chunks) > MAX_FAILED_CHUNK_RATIO and full:
+        logger.error(f"Calendar rebuild lost {failed}/{len(chunks)} chunks; keeping previous index")
+        return
+
+    kept = [
+        e for e in CALENDAR_INDEX["events"]
+        if e["symbol"] in universe and e["symbol"] not in refreshed
+    ]
+    # Dedupe (the same earnings date can appear twice) and sort by date
+    unique = {(e["date"], e["symbol"], e["type"]): e for e in kept + fresh}
+    ordered = sorted(unique.values(), key=lambda e: (e["date"], e["symbol"], e["type"]))
+    CALENDAR_INDEX["dates"] = [e["date"] for e in ordered]
+    CALENDAR_INDEX["events"] = ordered
+    CALENDAR_INDEX["covered"] = (CALENDAR_INDEX["covered"] & universe) | refreshed
+    if full and not failed:
+        CALENDAR_INDEX["built_at"] = datetime.now().isoformat()
+    logger.info(
+        f"Corporate calendar updated: {len(ordered)} events, {len(refreshed)} symbols refreshed, "
+        f"{failed} chunks failed"
+    )
+
+
+def track(symbols: Iterable[str]) -> List[str]:
+    """Register requested symbols; returns those not covered yet.
+
+    Once the sector index exists, symbols outside it are ignored so random
+    input cannot queue upstream work.
+    """
+    known = sector_index.SECTOR_INDEX["stocks"] if sector_index.is_ready() else None
+    pending = []
+    for s in symbols:
+        if known is not None and s not in known:
+            continue
+        REQUESTED_SYMBOLS[s] = True
+        if s not in CALENDAR_INDEX["covered"]:
+            pending.append(s)
+    if pending:
+        _wake.set()
+    return pending
+
+
+async def refresh_calendar(get_universe):
+    """Background loop; get_universe returns the hot and watched symbols.
+
+    Does a full rebuild daily (retrying hourly if the last one had failures)
+    and fetches newly tracked symbols as soon as they are requested.
+    """
+    while True:
+        # Cleared before the snapshot so a track() during the build wakes the next pass
+        _wake.clear()
+        try:
+            universe = list(dict.fromkeys(list(get_universe()) + list(REQUESTED_SYMBOLS.keys())))
+            built_at = CALENDAR_INDEX["built_at"]
+            stale = not built_at or datetime.now() - datetime.fromisoformat(built_at) > REFRESH_INTERVAL
+            if stale:
+                await build_calendar(universe, universe)
+            else:
+                new = [s for s in universe if s not in CALENDAR_INDEX["covered"]]
+                if new:
+                    await build_calendar(new, universe, full=False)
+        except Exception as e:
+            logger.error(f"Corporate calendar refresh failed: {e}")
+        try:
+            await asyncio.wait_for(_wake.wait(), CHECK_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def query(start: str, end: str, symbols: Optional[set] = None) -> List[dict]:
+    """Events with start <= date <= end (ISO strings), optionally filtered by symbol."""
+    dates, events = CALENDAR_INDEX["dates"], CALENDAR_INDEX["events"]
+    lo = bisect_left(dates, start)
+    hi = bisect_right(dates, end)
+    window = events[lo:hi]
+    if symbols:
+        window = [e for e in window if e["symbol"] in symbols]
+    return window
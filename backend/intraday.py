@@ -0,0 +1,165 @@
+"""Intraday OHLC bars built from the refresh loop's ticks.
+
+Each tracked symbol gets fixed-size, array-backed ring buffers of 1m and 5m
+bars for the current NSE session, so same-day intraday charts are served
+from memory. Buffers reset when a tick arrives for a new session.
+"""
+from array import array
+from datetime import datetime, time as dtime, timedelta, timezone
+from typing import Dict, List, Optional
+
+IST = timezone(timedelta(hours=5, minutes=30))
+SESSION_OPEN = dtime(9, 15)
+SESSION_CLOSE = dtime(15, 30)
+SESSION_MINUTES = 375
+
+INTERVAL_SECONDS = {"1m": 60, "5m": 300}
+# Buffers are only served if the newest bar is this recent (while the session is open)
+# and no more than this share of the session's bars is missing
+MIN_FRESHNESS_SECONDS = 150
+MAX_MISSING_RATIO = 0.2
+
+
+class BarRing:
+    """Fixed-capacity ring of OHLC bars stored in parallel typed arrays."""
+
+    def __init__(self, width: int, capacity: int):
+        self.width = width
+        self.capacity = capacity
+        self.times = array("q", [0] * capacity)
+        self.opens = array("d", [0.0] * capacity)
+        self.highs = array("d", [0.0] * capacity)
+        self.lows = array("d", [0.0] * capacity)
+        self.closes = array("d", [0.0] * capacity)
+        self.head = 0   # index of the newest bar
+        self.count = 0
+
+    def reset(self):
+        self.head = 0
+        self.count = 0
+
+    def add(self, ts: int, price: float):
+        bucket = ts - ts % self.width
+        if self.count and bucket == self.times[self.head]:
+            i = self.head
+            if price > self.highs[i]:
+                self.highs[i] = price
+            if price < self.lows[i]:
+                self.lows[i] = price
+            self.closes[i] = price
+            return
+        if self.count and bucket < self.times[self.head]:
+            return  # out-of-order tick
+        self.head = (self.head + 1) % self.capacity if self.count else 0
+        i = self.head
+        self.times[i] = bucket
+        self.opens[i] = self.highs[i] = self.lows[i] = self.closes[i] = price
+        self.count = min(self.count + 1, self.capacity)
+
+    def last_time(self) -> Optional[int]:
+        return self.times[self.head] if self.count else None
+
+    def first_time(self) -> Optional[int]:
+        if not self.count:
+            return None
+        return self.times[(self.head - self.count + 1) % self.capacity]
+
+    def bars(self) -> List[dict]:
+        out = []
+        start = self.head - self.count + 1
+        for k in range(self.count):
+            i = (start + k) % self.capacity
+            out.append({
+                "time": self.times[i],
+                "open": round(self.opens[i], 2), "high": round(self.highs[i], 2),
+                "low": round(self.lows[i], 2), "close": round(self.closes[i], 2)
+            })
+        return out
+
+
+class SymbolBars:
+    def __init__(self):
+        self.session = None
+        self.rings = {
+            name: BarRing(width, SESSION_MINUTES * 60 // width)
+            for name, width in INTERVAL_SECONDS.items()
+        }
+
+
+# Yahoo symbol (e.g. "RELIANCE.NS") -> bars for today's session
+INTRADAY_BARS: Dict[str, SymbolBars] = {}
+INTRADAY_STATE = {"session": None}
+
+
+def _session_bounds(day) -> tuple:
+    open_ts = int(datetime.combine(day, SESSION_OPEN, tzinfo=IST).timestamp())
+    close_ts = int(datetime.combine(day, SESSION_CLOSE, tzinfo=IST).timestamp())
+    return open_ts, close_ts
+
+
+def record_ticks(prices: Dict[str, float], ts: Optional[float] = None):
+    """Feed one refresh cycle's prices. Ticks outside market hours are ignored.
+
+    On the first tick of a new session, buffers for symbols that are no longer
+    part of the refresh set are dropped so memory stays bounded overall.
+    """
+    ts = int(ts if ts is not None else datetime.now(tz=IST).timestamp())
+    now = datetime.fromtimestamp(ts, tz=IST)
+    if now.weekday() >= 5:
+        return
+    open_ts, close_ts = _session_bounds(now.date())
+    if not open_ts <= ts < close_ts:
+        return
+
+    if INTRADAY_STATE["session"] != now.date():
+        for symbol in [s for s in INTRADAY_BARS if s not in prices]:
+            del INTRADAY_BARS[symbol]
+        INTRADAY_STATE["session"] = now.date()
+
+    for symbol, price in prices.items():
+        if price:
+            _record(symbol, float(price), ts, now.date())
+
+
+def _record(symbol: str, price: float, ts: int, session):
+    entry = INTRADAY_BARS.get(symbol)
+    if entry is None:
+        entry = INTRADAY_BARS[symbol] = SymbolBars()
+    if entry.session != session:
+        # Session rollover: yesterday's bars are discarded in place
+        for ring in entry.rings.values():
+            ring.reset()
+        entry.session = session
+    for ring in entry.rings.values():
+        ring.add(ts, price)
+
+
+def get_bars(symbol: str, interval: str, now_ts: Optional[float] = None) -> Optional[List[dict]]:
+    """Today's bars if the buffer is complete and current, else None.
+
+    A buffer that started mid-session (e.g. after a restart), stopped
+    updating (refresh loop stalled) or has too many gaps is not served;
+    callers fall back to upstream history in those cases.
+    """
+    entry = INTRADAY_BARS.get(symbol)
+    if entry is None or interval not in entry.rings:
+        return None
+    now_ts = int(now_ts if now_ts is not None else datetime.now(tz=IST).timestamp())
+    today = datetime.fromtimestamp(now_ts, tz=IST).date()
+    if entry.session != today:
+        return None
+    ring = entry.rings[interval]
+    first, last = ring.first_time(), ring.last_time()
+    if first is None:
+        return None
+    open_ts, close_ts = _session_bounds(today)
+    if first > open_ts + ring.width:
+        return None
+
+    end_ts = min(now_ts, close_ts)
+    if now_ts < close_ts and end_ts - last > max(2 * ring.width, MIN_FRESHNESS_SECONDS):
+        return None
+    expected = (end_ts - open_ts) // ring.width + 1
+    if ring.count < expected * (1 - MAX_MISSING_RATIO):
+        return None
+    return ring.bars()
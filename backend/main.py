@@ -1,21 +1,31 @@
+import time
+_BOOT_STARTED = time.perf_counter()
+
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from yahooquery import Ticker, search
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import re
 import random
 from cachetools import TTLCache
 import asyncio
 from typing import List, Optional
 import os
+import json
 import logging
 import auth
-from models import db
+import corporate_calendar
+import intraday
+import news_feed
+import sector_index
+import upstream
+from upstream import Ticker, search
+from models import db, db_ready
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -30,6 +40,10 @@ logger = logging.getLogger("gallagyan")
 # Ticker symbol whitelist pattern
 TICKER_PATTERN = re.compile(r'^[A-Z0-9.\-&]{1,20}$')
 
+# Chart ranges the frontend offers; anything else is rejected before reaching Yahoo
+HISTORY_PERIODS = {"1d", "5d", "1mo", "6mo", "1y", "5y"}
+HISTORY_INTERVALS = {"1m", "5m", "1d", "1wk", "1mo"}
+
 # CORS — loaded from environment, never wildcard in production
 _raw_origins = os.getenv("ALLOWED_ORIGINS", "https://gallagyan.xyz,https://www.gallagyan.xyz,http://localhost:3000")
 ALLOWED_ORIGINS = [o.strip() for o in _raw_origins.split(",") if o.strip()]
@@ -43,18 +57,49 @@ GLOBAL_MARKET_CACHE = {
     "last_updated": None
 }
 
+# Last good bootstrap payload, reloaded on boot so /bootstrap answers before the first refresh.
+# Only survives restarts if DATA_DIR is on a persistent disk (not on Render's free tier).
+MARKET_SNAPSHOT_PATH = os.path.join(sector_index.DATA_DIR, "market_snapshot.json")
+
+# Readiness is separate from liveness: /api/health answers as soon as we bind.
+# Market data counts as ready only if it was refreshed within this window.
+MARKET_FRESH_SECONDS = 180
+DB_INIT_MAX_BACKOFF_SECONDS = 60
+# Cold-start target: first response within this long of the process starting
+TTFB_TARGET_MS = 1000
+STARTUP_METRICS = {
+    "pre_import_ms": None,
+    "imports_ms": None,
+    "startup_ms": None,
+    "db_init_ms": None,
+    "first_refresh_ms": None,
+    "first_response_ms": None
+}
+
 # LRU Cache for on-demand stock data (1 hour TTL)
 STOCK_DETAIL_CACHE = TTLCache(maxsize=500, ttl=3600)
 HISTORY_CACHE = TTLCache(maxsize=500, ttl=3600)
-NEWS_CACHE = TTLCache(maxsize=200, ttl=1800)
 PEERS_CACHE = TTLCache(maxsize=200, ttl=7200)
 
+# Shared live quotes keyed by clean symbol, fed by the refresh loop and get_stock
+QUOTE_CACHE = TTLCache(maxsize=1000, ttl=300)
+# Peer symbols recently served by /peers; a separate loop keeps their quotes warm.
+# Bounded because they are fetched in one best-effort call per cycle.
+PEER_QUOTE_WATCH = TTLCache(maxsize=50, ttl=3600)
+PEER_REFRESH_SECONDS = 120
+
+# Most symbols one /api/calendar request may ask for
+MAX_CALENDAR_SYMBOLS = 50
+
 # High-priority stocks for background refresh
 HOT_STOCKS = [
     "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "INFY.NS", "ICICIBANK.NS",
     "SBIN.NS", "BHARTIARTL.NS", "LICI.NS", "ITC.NS", "HINDUNILVR.NS"
 ]
 
+# Market refresh period; also the spacing of intraday ticks
+REFRESH_PERIOD_SECONDS = 45
+
 INDEX_SYMBOLS = ["^NSEI", "^BSESN"]
 SECTOR_MAP = {
     '^NSEI': 'Nifty 50', '^BSESN': 'Sensex', '^NSEBANK': 'Bank Nifty',
@@ -77,13 +122,144 @@ SECTOR_PEERS = {
 }
 
 
+def _ms_since_boot() -> int:
+    return round((time.perf_counter() - _BOOT_STARTED) * 1000)
+
+
+def _process_age_ms() -> Optional[int]:
+    """Milliseconds since this process started (interpreter and server boot included).
+
+    Linux only, via /proc; returns None elsewhere.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return round((uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _load_market_snapshot():
+    try:
+        with open(MARKET_SNAPSHOT_PATH) as f:
+            snapshot = json.load(f)
+        GLOBAL_MARKET_CACHE.update({k: snapshot[k] for k in ("indices", "sectors", "last_updated")})
+        logger.info(f"Loaded market snapshot from {GLOBAL_MARKET_CACHE['last_updated']}")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable market snapshot: {e}")
+
+
+def _save_market_snapshot():
+    try:
+        tmp_path = MARKET_SNAPSHOT_PATH + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(GLOBAL_MARKET_CACHE, f)
+        os.replace(tmp_path, MARKET_SNAPSHOT_PATH)
+    except Exception as e:
+        logger.warning(f"Failed to save market snapshot: {e}")
+
+
+def _market_is_fresh() -> bool:
+    last_updated = GLOBAL_MARKET_CACHE["last_updated"]
+    if not last_updated:
+        return False
+    age = datetime.now() - datetime.fromisoformat(last_updated)
+    return age.total_seconds() <= MARKET_FRESH_SECONDS
+
+
+def _market_status() -> str:
+    if _market_is_fresh():
+        return "hyper-ready"
+    # A snapshot from a previous process does not count until we refresh ourselves
+    return "warming-up" if STARTUP_METRICS["first_refresh_ms"] is None else "stale"
+
+
+async def _init_db_in_background():
+    """Run init_db off the startup path, retrying with backoff until it succeeds.
+
+    Auth endpoints answer 503 until models.db_ready is set.
+    """
+    from models import init_db
+    started = time.perf_counter()
+    delay = 1
+    while True:
+        try:
+            await asyncio.to_thread(init_db)
+            break
+        except Exception as e:
+            logger.error(f"Failed to initialize database, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, DB_INIT_MAX_BACKOFF_SECONDS)
+    STARTUP_METRICS["db_init_ms"] = round((time.perf_counter() - started) * 1000)
+    logger.info(f"Database initialized in {STARTUP_METRICS['db_init_ms']}ms")
+
+
+def _quote_from_price(p: dict, sym: str) -> dict:
+    clean_sym = sym.replace('.NS', '').replace('.BO', '')
+    return {
+        "symbol": clean_sym,
+        "name": p.get('longName') or clean_sym,
+        "price": p.get('regularMarketPrice'),
+        "percent_change": round(p.get('regularMarketChangePercent', 0) * 100, 2)
+    }
+
+
+def _calendar_universe() -> List[str]:
+    """Hot stocks plus watched peers; /api/calendar adds requested symbols itself."""
+    return [s.replace('.NS', '') for s in HOT_STOCKS] + list(PEER_QUOTE_WATCH.keys())
+
+
+def _store_quotes(p_data: dict, syms: List[str]):
+    for sym in syms:
+        p = p_data.get(sym, {})
+        if isinstance(p, dict) and p.get('regularMarketPrice'):
+            QUOTE_CACHE[sym.replace('.NS', '')] = _quote_from_price(p, sym)
+
+
+async def refresh_peer_quotes():
+    """Best-effort quote refresh for watched peers, on its own task and cadence
+    so a slow peer batch never delays the core market refresh."""
+    while True:
+        peer_syms = [f"{s}.NS" for s in list(PEER_QUOTE_WATCH.keys())]
+        if peer_syms:
+            try:
+                p_data = await upstream.call(
+                    lambda: Ticker(peer_syms).price, priority=upstream.BACKGROUND, timeout=60,
+                    cost=upstream.request_cost(peer_syms)
+                )
+                _store_quotes(p_data, peer_syms)
+            except Exception as e:
+                logger.warning(f"Peer quote refresh failed: {e}")
+        await asyncio.sleep(PEER_REFRESH_SECONDS)
+
+
 async def refresh_market_data():
-    """Background engine keeping market data ready in memory."""
+    """Background engine keeping market data ready in memory.
+
+    Runs on a fixed period rather than a fixed pause after the work, so
+    intraday ticks stay evenly spaced however long the upstream call takes.
+    """
+    loop = asyncio.get_running_loop()
+    next_run = loop.time()
     while True:
         try:
-            all_syms = INDEX_SYMBOLS + list(SECTOR_MAP.keys()) + HOT_STOCKS
-            t = await asyncio.to_thread(Ticker, all_syms)
-            p_data = t.price
+            all_syms = list(dict.fromkeys(INDEX_SYMBOLS + list(SECTOR_MAP.keys()) + HOT_STOCKS))
+            p_data = await upstream.call(
+                lambda: Ticker(all_syms).price, priority=upstream.REFRESH, timeout=30,
+                cost=upstream.request_cost(all_syms)
+            )
+
+            # 0. Feed intraday bar buffers while the exchange is in regular session.
+            # Only hot stocks: /history cannot be asked for the ^ index symbols.
+            intraday.record_ticks({
+                sym: p.get('regularMarketPrice') for sym, p in p_data.items()
+                if sym in HOT_STOCKS and isinstance(p, dict) and p.get('marketState', 'REGULAR') == 'REGULAR'
+            })
 
             # 1. Update Indices
             new_indices = []
@@ -119,36 +295,59 @@ async def refresh_market_data():
                         "market_cap": p.get('marketCap')
                     }
 
+            # 4. Update shared quotes for hot stocks
+            _store_quotes(p_data, HOT_STOCKS)
+
             GLOBAL_MARKET_CACHE["indices"] = new_indices
             GLOBAL_MARKET_CACHE["sectors"] = new_sectors
             GLOBAL_MARKET_CACHE["last_updated"] = datetime.now().isoformat()
+            if STARTUP_METRICS["first_refresh_ms"] is None:
+                STARTUP_METRICS["first_refresh_ms"] = _ms_since_boot()
+                logger.info(f"First market refresh completed {STARTUP_METRICS['first_refresh_ms']}ms after boot")
+            _save_market_snapshot()
             logger.info("Market cache refreshed successfully")
 
         except Exception as e:
             logger.error(f"Background market refresh failed: {e}")
 
-        await asyncio.sleep(45)
+        next_run += REFRESH_PERIOD_SECONDS
+        now = loop.time()
+        if next_run < now:
+            # Overran a whole period: go again now instead of bunching the missed ticks
+            next_run = now
+        await asyncio.sleep(next_run - now)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """App lifespan — start background refresh task on startup."""
+    """App lifespan — start background tasks without blocking the bind."""
     logger.info("GallaGyan API starting up")
-    
-    # Initialize database and default user
-    from models import init_db
-    try:
-        init_db()
-        logger.info("Database initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
+    _load_market_snapshot()
 
+    db_task = asyncio.create_task(_init_db_in_background())
     task = asyncio.create_task(refresh_market_data())
+    peer_task = asyncio.create_task(refresh_peer_quotes())
+    index_task = asyncio.create_task(sector_index.refresh_sector_index())
+    news_task = asyncio.create_task(news_feed.refresh_news(HOT_STOCKS))
+    calendar_task = asyncio.create_task(corporate_calendar.refresh_calendar(_calendar_universe))
+    STARTUP_METRICS["startup_ms"] = _ms_since_boot()
+    logger.info(f"Startup completed in {STARTUP_METRICS['startup_ms']}ms (imports {STARTUP_METRICS['imports_ms']}ms)")
     yield
+    db_task.cancel()
     task.cancel()
+    peer_task.cancel()
+    index_task.cancel()
+    news_task.cancel()
+    calendar_task.cancel()
+    upstream.shutdown()
     logger.info("GallaGyan API shut down")
 
 
+STARTUP_METRICS["imports_ms"] = _ms_since_boot()
+_process_age = _process_age_ms()
+if _process_age is not None:
+    STARTUP_METRICS["pre_import_ms"] = max(_process_age - STARTUP_METRICS["imports_ms"], 0)
+
 # Initialize FastAPI
 app = FastAPI(title="GallaGyan Hyper-Speed API", lifespan=lifespan)
 limiter = Limiter(key_func=get_remote_address)
@@ -167,6 +366,18 @@ app.add_middleware(
 app.include_router(auth.router)
 
 
+@app.middleware("http")
+async def record_first_response(request: Request, call_next):
+    """Record time to the first response, measured from process start where known."""
+    response = await call_next(request)
+    if STARTUP_METRICS["first_response_ms"] is None:
+        STARTUP_METRICS["first_response_ms"] = _ms_since_boot() + (STARTUP_METRICS["pre_import_ms"] or 0)
+        level = logging.INFO if STARTUP_METRICS["first_response_ms"] <= TTFB_TARGET_MS else logging.WARNING
+        logger.log(level, f"First response {STARTUP_METRICS['first_response_ms']}ms after process start "
+                          f"(target {TTFB_TARGET_MS}ms, {request.url.path})")
+    return response
+
+
 def validate_ticker(ticker: str) -> str:
     """Validate and normalise a ticker symbol. Raises HTTP 400 if invalid."""
     clean = ticker.upper().strip()
@@ -183,7 +394,8 @@ async def get_market_bootstrap():
     return {
         "indices": GLOBAL_MARKET_CACHE["indices"],
         "sectors": GLOBAL_MARKET_CACHE["sectors"],
-        "status": "hyper-ready"
+        "last_updated": GLOBAL_MARKET_CACHE["last_updated"],
+        "status": _market_status()
     }
 
 
@@ -193,7 +405,7 @@ async def get_suggestions(query: str = ""):
     if len(query) < 2:
         return []
     try:
-        results = await asyncio.to_thread(search, f"{query} NSE")
+        results = await upstream.call(search, f"{query} NSE")
         quotes = []
         for q in results.get('quotes', []):
             sym = q.get('symbol', '')
@@ -217,14 +429,18 @@ async def get_stock(ticker: str):
 
     try:
         sym = f"{ticker}.NS"
-        t = await asyncio.to_thread(Ticker, [sym, f"{ticker}.BO"])
-        p_data = t.price
+
+        def fetch():
+            t = Ticker([sym, f"{ticker}.BO"])
+            return t.price, t.summary_detail
+
+        p_data, summary_data = await upstream.call(fetch, cost=upstream.request_cost([sym, f"{ticker}.BO"], 2))
         p = p_data.get(sym, p_data.get(f"{ticker}.BO", {}))
 
         if not p or not p.get('regularMarketPrice'):
             raise HTTPException(status_code=404, detail=f"Stock '{ticker}' not found")
 
-        summary = t.summary_detail.get(sym, t.summary_detail.get(f"{ticker}.BO", {}))
+        summary = summary_data.get(sym, summary_data.get(f"{ticker}.BO", {}))
         res = {
             "symbol": sym if sym in p_data else f"{ticker}.BO",
             "name": p.get('longName') or ticker,
@@ -237,9 +453,13 @@ async def get_stock(ticker: str):
             "fiftyTwoWeekLow": summary.get('fiftyTwoWeekLow')
         }
         STOCK_DETAIL_CACHE[ticker] = res
+        QUOTE_CACHE[ticker] = _quote_from_price(p, res["symbol"])
         return res
     except HTTPException:
         raise
+    except upstream.UpstreamError as e:
+        logger.warning(f"Upstream unavailable for stock '{ticker}': {e}")
+        raise HTTPException(status_code=503, detail="Market data temporarily unavailable")
     except Exception as e:
         logger.error(f"Failed to fetch stock '{ticker}': {e}")
         raise HTTPException(status_code=404, detail=f"Stock '{ticker}' not found")
@@ -248,14 +468,24 @@ async def get_stock(ticker: str):
 @app.get("/api/stock/{ticker}/history")
 async def get_history(ticker: str, period: str = "1mo", interval: str = "1d"):
     ticker = validate_ticker(ticker)
+    if period not in HISTORY_PERIODS or interval not in HISTORY_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Unsupported period '{period}' or interval '{interval}'")
+    sym = ticker if "." in ticker else f"{ticker}.NS"
+
+    # Same-day intraday charts for tracked symbols come from the refresh loop's bars
+    if period == "1d" and interval in intraday.INTERVAL_SECONDS:
+        bars = intraday.get_bars(sym, interval)
+        if bars:
+            return bars
+
     cache_key = f"{ticker}_{period}_{interval}"
     if cache_key in HISTORY_CACHE:
         return HISTORY_CACHE[cache_key]
 
-    sym = ticker if "." in ticker else f"{ticker}.NS"
+    # Intraday bars need a timestamp; daily and longer keep the date string
+    is_intraday = interval.endswith(("m", "h"))
     try:
-        t = await asyncio.to_thread(Ticker, sym)
-        df = t.history(period=period, interval=interval)
+        df = await upstream.call(lambda: Ticker(sym).history(period=period, interval=interval))
         if df is None or (hasattr(df, 'empty') and df.empty):
             return []
 
@@ -263,7 +493,7 @@ async def get_history(ticker: str, period: str = "1mo", interval: str = "1d"):
         df = df.reset_index()
         for _, row in df.iterrows():
             history.append({
-                "time": row['date'].strftime('%Y-%m-%d'),
+                "time": int(row['date'].timestamp()) if is_intraday else row['date'].strftime('%Y-%m-%d'),
                 "open": round(row['open'], 2), "high": round(row['high'], 2),
                 "low": round(row['low'], 2), "close": round(row['close'], 2)
             })
@@ -278,13 +508,42 @@ async def get_history(ticker: str, period: str = "1mo", interval: str = "1d"):
 async def get_peers(ticker: str):
     """Return same-sector peer stocks for a given ticker."""
     ticker = validate_ticker(ticker)
+
+    # Fast path: peers from the sector index, prices from the shared quote cache
+    ranked = sector_index.rank_peers(ticker)
+    if ranked is not None:
+        for peer in ranked["peers"]:
+            PEER_QUOTE_WATCH[peer["symbol"]] = True
+        missing = [p["symbol"] for p in ranked["peers"] if p["symbol"] not in QUOTE_CACHE]
+        if missing:
+            # First sight of these peers: one batched price call, then the refresh loop keeps them warm
+            ns_syms = [f"{s}.NS" for s in missing]
+            try:
+                p_data = await upstream.call(lambda: Ticker(ns_syms).price, cost=upstream.request_cost(ns_syms))
+                _store_quotes(p_data, ns_syms)
+            except Exception as e:
+                logger.warning(f"Peer quote fetch failed for '{ticker}': {e}")
+
+        # As before, peers without a price are left out rather than returned with nulls
+        peers = []
+        for peer in ranked["peers"]:
+            quote = QUOTE_CACHE.get(peer["symbol"])
+            if quote:
+                peers.append({
+                    **quote,
+                    "industry": peer.get("industry"),
+                    "market_cap": peer.get("market_cap")
+                })
+        return {"sector": ranked["sector"], "industry": ranked["industry"], "peers": peers}
+
+    # Slow path: index not built yet or ticker not in it
     if ticker in PEERS_CACHE:
         return PEERS_CACHE[ticker]
 
     try:
         sym = f"{ticker}.NS"
-        t = await asyncio.to_thread(Ticker, sym)
-        profile = t.asset_profile.get(sym, {})
+        profiles = await upstream.call(lambda: Ticker(sym).asset_profile)
+        profile = profiles.get(sym, {})
         sector = profile.get("sector") if isinstance(profile, dict) else None
 
         # Find sector peers; fall back to Nifty 50 blue chips
@@ -295,8 +554,7 @@ async def get_peers(ticker: str):
 
         # Fetch current prices for peers
         ns_syms = [f"{s}.NS" for s in peer_symbols]
-        pt = await asyncio.to_thread(Ticker, ns_syms)
-        p_data = pt.price
+        p_data = await upstream.call(lambda: Ticker(ns_syms).price, cost=upstream.request_cost(ns_syms))
 
         peers = []
         for s, ns in zip(peer_symbols, ns_syms):
@@ -321,36 +579,91 @@ async def get_peers(ticker: str):
 async def get_news(ticker: str):
     """Return recent news articles for a given ticker."""
     ticker = validate_ticker(ticker)
-    if ticker in NEWS_CACHE:
-        return NEWS_CACHE[ticker]
+    if news_feed.has_yahoo_news(ticker):
+        return news_feed.get_articles(ticker) or []
 
+    # RSS mentions alone are not enough: fetch the ticker's Yahoo news once into the index
     try:
-        sym = f"{ticker}.NS"
-        t = await asyncio.to_thread(Ticker, sym)
-        raw_news = t.news(count=10)
-
-        articles = []
-        for item in (raw_news or []):
-            articles.append({
-                "title": item.get("title", ""),
-                "publisher": item.get("publisher", ""),
-                "link": item.get("link", ""),
-                "providerPublishTime": item.get("providerPublishTime", 0),
-                "sentiment": "Neutral"
-            })
-
-        NEWS_CACHE[ticker] = articles
-        return articles
+        await news_feed.fetch_ticker_news(ticker)
     except Exception as e:
         logger.error(f"Failed to fetch news for '{ticker}': {e}")
-        return []
+    return news_feed.get_articles(ticker) or []
+
+
+@app.get("/api/news/market")
+async def get_market_news(limit: int = 20):
+    """Market-wide feed from the ingest pipeline with an aggregate sentiment."""
+    articles = news_feed.get_articles("MARKET", limit=min(max(limit, 1), 100)) or []
+    return {
+        "articles": articles,
+        "sentiment": news_feed.aggregate_sentiment(articles),
+        "last_updated": news_feed.NEWS_STATE["last_ingest"]
+    }
+
+
+def _parse_date(value: Optional[str], default: date, field: str) -> str:
+    if not value:
+        return default.isoformat()
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid '{field}' date '{value}'. Use YYYY-MM-DD.")
+
+
+@app.get("/api/calendar")
+async def get_calendar(
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+    symbols: Optional[str] = None
+):
+    """Corporate events (earnings, dividends, splits) in a date range; defaults to the next 7 days."""
+    today = date.today()
+    start = _parse_date(from_, today, "from")
+    end = _parse_date(to, today + timedelta(days=7), "to")
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+
+    wanted, pending = None, []
+    if symbols:
+        raw = [s for s in symbols.split(",") if s.strip()]
+        if len(raw) > MAX_CALENDAR_SYMBOLS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_CALENDAR_SYMBOLS} symbols per request")
+        # Events are keyed by the bare NSE symbol
+        wanted = {re.sub(r'\.(NS|BO)$', '', validate_ticker(s)) for s in raw}
+        # Untracked symbols are fetched by the background job shortly after this request
+        pending = corporate_calendar.track(wanted)
+
+    return {
+        "from": start,
+        "to": end,
+        "events": corporate_calendar.query(start, end, wanted),
+        "pending": sorted(pending),
+        "last_updated": corporate_calendar.CALENDAR_INDEX["built_at"]
+    }
+
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness probe: 200 once the database and market cache are usable."""
+    db_ok, market_ok = db_ready.is_set(), _market_is_fresh()
+    body = {"ready": db_ok and market_ok, "db": db_ok, "market": market_ok, "startup": STARTUP_METRICS}
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
 
 
 @app.get("/api/health")
 async def health():
     return {
         "status": "hyper-optimized",
-        "cache_last_updated": GLOBAL_MARKET_CACHE["last_updated"]
+        "cache_last_updated": GLOBAL_MARKET_CACHE["last_updated"],
+        "sector_index_built_at": sector_index.SECTOR_INDEX["built_at"],
+        "sector_index_size": len(sector_index.SECTOR_INDEX["stocks"]),
+        "news_last_ingest": news_feed.NEWS_STATE["last_ingest"],
+        "news_articles": len(news_feed.ARTICLES),
+        "calendar_built_at": corporate_calendar.CALENDAR_INDEX["built_at"],
+        "calendar_events": len(corporate_calendar.CALENDAR_INDEX["events"]),
+        "calendar_symbols": len(corporate_calendar.CALENDAR_INDEX["covered"]),
+        "upstream": upstream.stats(),
+        "startup": STARTUP_METRICS
     }
 
 
@@ -1,14 +1,23 @@
 from peewee import *
-from pwdlib import PasswordHash
-from pwdlib.hashers.bcrypt import BcryptHasher
+from functools import lru_cache
 import os
 import json
+import threading
 
 # Database file location
 db_path = os.path.join(os.path.dirname(__file__), "gallagyan.db")
 db = SqliteDatabase(db_path)
 
-password_hash = PasswordHash((BcryptHasher(),))
+# Set once init_db has finished; auth endpoints answer 503 until then
+db_ready = threading.Event()
+
+
+@lru_cache(maxsize=1)
+def get_password_hash():
+    """Build the bcrypt hasher on first use so pwdlib stays off the cold-start path."""
+    from pwdlib import PasswordHash
+    from pwdlib.hashers.bcrypt import BcryptHasher
+    return PasswordHash((BcryptHasher(),))
 
 
 class BaseModel(Model):
@@ -29,27 +38,35 @@ class UserData(BaseModel):
     alerts = TextField(default='[]')      # JSON string of alert items
 
 
+def _verifies(password_hash, passcode: str, hashed: str) -> bool:
+    try:
+        return password_hash.verify(passcode, hashed)
+    except Exception:
+        return False  # unknown or corrupt hash format
+
+
 def init_db():
     print("INITIALIZING DATABASE...")
-    db.connect()
-    db.create_tables([User, UserData])
-
-    # Default user for the dashboard
-    default_passcode = "anand"
-    hashed = password_hash.hash(default_passcode)
-
-    user, created = User.get_or_create(
-        username='sagar',
-        defaults={'passcode': hashed}
-    )
-    if not created:
-        user.passcode = hashed
-        user.save()
-    
-    if created or not UserData.select().where(UserData.user == user).exists():
-        UserData.get_or_create(user=user)
+    db.connect(reuse_if_open=True)
+    try:
+        db.create_tables([User, UserData])
+
+        # Default user for the dashboard
+        default_passcode = "anand"
+        password_hash = get_password_hash()
 
-    db.close()
+        user = User.get_or_none(User.username == 'sagar')
+        if user is None:
+            user = User.create(username='sagar', passcode=password_hash.hash(default_passcode))
+        elif not _verifies(password_hash, default_passcode, user.passcode):
+            # Only rehash and rewrite when the stored hash no longer matches
+            user.passcode = password_hash.hash(default_passcode)
+            user.save()
+
+        UserData.get_or_create(user=user)
+    finally:
+        db.close()
+    db_ready.set()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,326 @@
+"""Background news ingestion with a ticker index and batch sentiment scoring.
+
+RSS feeds and yahooquery news for hot tickers are polled on an interval,
+deduplicated by content hash and indexed by ticker so that /news is a
+memory lookup.
+"""
+from cachetools import TTLCache
+from collections import OrderedDict, deque
+from calendar import timegm
+from datetime import datetime
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sector_index
+import upstream
+from upstream import Ticker
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEEDS = [
+    "https://www.moneycontrol.com/rss/marketreports.xml",
+    "https://economictimes.indiatimes.com/markets/rssfeeds/1977021501.cms",
+    "https://www.livemint.com/rss/markets",
+    "https://www.business-standard.com/rss/markets-106.rss",
+]
+_raw_feeds = os.getenv("NEWS_FEEDS", "")
+NEWS_FEEDS = [f.strip() for f in _raw_feeds.split(",") if f.strip()] or DEFAULT_FEEDS
+
+INGEST_INTERVAL_SECONDS = 300
+FEED_TIMEOUT_SECONDS = 15
+MAX_ARTICLES = 2000
+MAX_PER_TICKER = 50
+YAHOO_NEWS_COUNT = 10
+
+# Pseudo-tickers the frontend uses for the market-wide feed
+MARKET_ALIASES = {"NIFTY", "NIFTY50", "SENSEX", "MARKET"}
+
+# Small finance lexicon; scores are summed per headline
+SENTIMENT_LEXICON = {
+    "surge": 2, "surges": 2, "soar": 2, "soars": 2, "rally": 2, "rallies": 2,
+    "jump": 1, "jumps": 1, "gain": 1, "gains": 1, "rise": 1, "rises": 1,
+    "up": 0.5, "high": 1, "record": 1, "beat": 1, "beats": 1, "profit": 1,
+    "growth": 1, "upgrade": 2, "upgrades": 2, "buy": 1, "outperform": 2,
+    "bullish": 2, "strong": 1, "boost": 1, "boosts": 1, "positive": 1,
+    "dividend": 1, "bonus": 1, "wins": 1, "order": 0.5, "expansion": 1,
+    "fall": -1, "falls": -1, "drop": -1, "drops": -1, "decline": -1,
+    "declines": -1, "slump": -2, "slumps": -2, "crash": -2, "plunge": -2,
+    "plunges": -2, "tumble": -2, "tumbles": -2, "down": -0.5, "low": -1,
+    "loss": -1, "losses": -1, "miss": -1, "misses": -1, "downgrade": -2,
+    "downgrades": -2, "sell": -1, "underperform": -2, "bearish": -2,
+    "weak": -1, "probe": -1, "fraud": -2, "penalty": -1, "default": -2,
+    "negative": -1, "cut": -1, "cuts": -1, "lawsuit": -1, "raid": -1,
+}
+_WORD_RE = re.compile(r"[a-z0-9&\-]+")
+_SYMBOL_RE = re.compile(r"\b[A-Z0-9&\-]{2,20}\b")
+# Explicit "$RELIANCE" / "NSE: RELIANCE" mentions are trusted even in all-caps text
+_SYMBOL_CONTEXT_RE = re.compile(r"(?:\$|\bNSE:\s*)([A-Z0-9&\-]{2,20})\b")
+# Legal-form suffixes, stripped only from the end of a company name
+_NAME_SUFFIXES = {"limited", "ltd", "corporation", "corp", "company", "co", "inc", "plc"}
+# Exchange and index words; written in capitals they name the market, not the listed company
+_MARKET_WORDS = {"BSE", "NSE", "NIFTY", "SENSEX", "BANKNIFTY", "FINNIFTY", "MCX"}
+# Single-token aliases made of one of these words are too generic to tag on
+_COMMON_WORDS = {
+    "bank", "of", "the", "and", "india", "indian", "bharat", "national", "general", "first",
+    "oil", "gas", "coal", "power", "energy", "steel", "gold", "cement", "sugar", "paper",
+    "tea", "coffee", "metal", "metals", "petroleum", "chemicals", "pharma",
+    "finance", "financial", "capital", "insurance", "life", "housing", "home", "credit",
+    "industries", "industrial", "infrastructure", "infra", "engineering", "motors", "auto",
+    "textiles", "foods", "hotels", "airlines", "ports", "realty", "estates", "projects",
+    "global", "international", "united", "new", "star", "sun", "green", "city", "union",
+    "trust", "market", "markets", "stock", "stocks", "shares", "exchange", "bse", "nse",
+}
+
+ARTICLES: "OrderedDict[str, dict]" = OrderedDict()
+TICKER_INDEX: Dict[str, deque] = {}
+MARKET_FEED: deque = deque(maxlen=MAX_ARTICLES)
+
+# First token -> list of (name tokens, symbol) for company-name matching
+_ALIAS_INDEX: Dict[str, List[tuple]] = {}
+# Known symbols, matched only when written in capitals (avoids "SAIL" vs "sail")
+_KNOWN_SYMBOLS: set = set()
+
+# Tickers whose Yahoo news was ingested recently; RSS-only hits do not count
+YAHOO_COVERAGE = TTLCache(maxsize=1000, ttl=1800)
+
+NEWS_STATE = {"last_ingest": None, "aliases_built_from": None}
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def content_hash(title: str) -> str:
+    """Hash of the normalised headline; the same story from two feeds collapses."""
+    return hashlib.sha1(" ".join(_tokens(title)).encode()).hexdigest()
+
+
+def score_sentiment(texts: List[str]) -> List[str]:
+    """Score a batch of headlines with the lexicon."""
+    labels = []
+    for text in texts:
+        score = sum(SENTIMENT_LEXICON.get(tok, 0) for tok in _tokens(text))
+        labels.append("Bullish" if score >= 1 else "Bearish" if score <= -1 else "Neutral")
+    return labels
+
+
+def aggregate_sentiment(articles: Iterable[dict]) -> str:
+    score = 0
+    for a in articles:
+        score += {"Bullish": 1, "Bearish": -1}.get(a.get("sentiment"), 0)
+    return "Bullish" if score > 0 else "Bearish" if score < 0 else "Neutral"
+
+
+def set_company_aliases(names: Dict[str, str]):
+    """Rebuild the company-name matcher from a symbol -> long name map."""
+    alias_index = {}
+    for sym, name in names.items():
+        name_toks = _tokens(name or "")
+        while name_toks and name_toks[-1] in _NAME_SUFFIXES:
+            name_toks.pop()
+        if len(name_toks) == 1 and name_toks[0] in _COMMON_WORDS:
+            continue
+        if name_toks:
+            alias_index.setdefault(name_toks[0], []).append((tuple(name_toks), sym))
+    _ALIAS_INDEX.clear()
+    _ALIAS_INDEX.update(alias_index)
+    _KNOWN_SYMBOLS.clear()
+    _KNOWN_SYMBOLS.update(names.keys())
+
+
+def _is_shouting(text: str) -> bool:
+    letters = [c for c in text if c.isalpha()]
+    return bool(letters) and sum(c.isupper() for c in letters) / len(letters) > 0.6
+
+
+def match_tickers(text: str) -> List[str]:
+    candidates = _SYMBOL_CONTEXT_RE.findall(text)
+    if not _is_shouting(text):
+        # Bare capitalised symbols only mean something in mixed-case text
+        candidates += [s for s in _SYMBOL_RE.findall(text) if s not in _MARKET_WORDS]
+    found = [s for s in dict.fromkeys(candidates) if s in _KNOWN_SYMBOLS]
+    toks = _tokens(text)
+    for i, tok in enumerate(toks):
+        for alias, sym in _ALIAS_INDEX.get(tok, ()):
+            if tuple(toks[i:i + len(alias)]) == alias and sym not in found:
+                found.append(sym)
+    return found
+
+
+def _evict_oldest():
+    while len(ARTICLES) > MAX_ARTICLES:
+        old_id, old = ARTICLES.popitem(last=False)
+        for sym in old["tickers"]:
+            ids = TICKER_INDEX.get(sym)
+            if ids is not None:
+                try:
+                    ids.remove(old_id)
+                except ValueError:
+                    pass
+                if not ids:
+                    del TICKER_INDEX[sym]
+
+
+def ingest(items: List[dict]) -> int:
+    """Deduplicate, score and index a batch of raw articles. Returns new count."""
+    fresh = []
+    seen = set()
+    for item in items:
+        if not item.get("title"):
+            continue
+        h = content_hash(item["title"])
+        if h in seen:
+            continue
+        seen.add(h)
+        if h in ARTICLES:
+            # Same story seen again: merge any extra ticker tags
+            existing = ARTICLES[h]
+            for sym in item.get("tickers", []):
+                if sym not in existing["tickers"]:
+                    existing["tickers"].append(sym)
+                    TICKER_INDEX.setdefault(sym, deque(maxlen=MAX_PER_TICKER)).appendleft(h)
+            continue
+        fresh.append((h, item))
+
+    labels = score_sentiment([item["title"] for _, item in fresh])
+    for (h, item), label in zip(fresh, labels):
+        tickers = list(item.get("tickers", []))
+        for sym in match_tickers(item["title"]) + match_tickers(item.get("summary", "")):
+            if sym not in tickers:
+                tickers.append(sym)
+        ARTICLES[h] = {
+            "title": item["title"],
+            "publisher": item.get("publisher", ""),
+            "link": item.get("link", ""),
+            "providerPublishTime": item.get("providerPublishTime", 0),
+            "sentiment": label,
+            "tickers": tickers
+        }
+        for sym in tickers:
+            TICKER_INDEX.setdefault(sym, deque(maxlen=MAX_PER_TICKER)).appendleft(h)
+        MARKET_FEED.appendleft(h)
+
+    _evict_oldest()
+    return len(fresh)
+
+
+def _fetch_feed(url: str) -> List[dict]:
+    import feedparser
+    import requests
+
+    # feedparser's own fetch has no timeout; a hung feed would stall the whole loop
+    resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=FEED_TIMEOUT_SECONDS)
+    resp.raise_for_status()
+    parsed = feedparser.parse(resp.content)
+    publisher = parsed.feed.get("title", "") if hasattr(parsed, "feed") else ""
+    items = []
+    for entry in parsed.entries:
+        published = entry.get("published_parsed") or entry.get("updated_parsed")
+        items.append({
+            "title": entry.get("title", ""),
+            "summary": entry.get("summary", ""),
+            "publisher": publisher,
+            "link": entry.get("link", ""),
+            "providerPublishTime": timegm(published) if published else 0,
+        })
+    return items
+
+
+async def _fetch_yahoo_news(symbols: List[str]) -> List[dict]:
+    items = []
+    for sym in symbols:
+        try:
+            raw = await upstream.call(
+                lambda: Ticker(sym).news(count=YAHOO_NEWS_COUNT), priority=upstream.BACKGROUND
+            )
+        except Exception as e:
+            logger.warning(f"Yahoo news fetch failed for '{sym}': {e}")
+            continue
+        clean = sym.replace(".NS", "").replace(".BO", "")
+        items.extend(_yahoo_items(raw, clean))
+        YAHOO_COVERAGE[clean] = True
+    return items
+
+
+def _yahoo_items(raw, ticker: str) -> List[dict]:
+    return [
+        {
+            "title": item.get("title", ""),
+            "publisher": item.get("publisher", ""),
+            "link": item.get("link", ""),
+            "providerPublishTime": item.get("providerPublishTime", 0),
+            "tickers": [ticker]
+        }
+        for item in (raw if isinstance(raw, list) else []) if isinstance(item, dict)
+    ]
+
+
+async def fetch_ticker_news(ticker: str):
+    """Interactive one-off Yahoo fetch for a ticker the ingester does not cover."""
+    raw = await upstream.call(lambda: Ticker(f"{ticker}.NS").news(count=YAHOO_NEWS_COUNT))
+    ingest(_yahoo_items(raw, ticker))
+    YAHOO_COVERAGE[ticker] = True
+
+
+def has_yahoo_news(ticker: str) -> bool:
+    return ticker in MARKET_ALIASES or ticker in YAHOO_COVERAGE
+
+
+def _refresh_aliases():
+    """Rebuild the name matcher whenever the sector index has been rebuilt."""
+    built_at = sector_index.SECTOR_INDEX["built_at"]
+    if built_at and built_at != NEWS_STATE["aliases_built_from"]:
+        set_company_aliases({s: i.get("name") for s, i in sector_index.SECTOR_INDEX["stocks"].items()})
+        NEWS_STATE["aliases_built_from"] = built_at
+
+
+async def ingest_once(hot_symbols: List[str]):
+    _refresh_aliases()
+    items = []
+    for url in NEWS_FEEDS:
+        try:
+            items.extend(await asyncio.to_thread(_fetch_feed, url))
+        except Exception as e:
+            logger.warning(f"RSS fetch failed for '{url}': {e}")
+    items.extend(await _fetch_yahoo_news(hot_symbols))
+
+    # Oldest first so the newest articles end up at the front of each deque
+    items.sort(key=lambda a: a.get("providerPublishTime") or 0)
+    added = ingest(items)
+    logger.info(f"News ingest added {added} articles ({len(ARTICLES)} held)")
+
+
+async def refresh_news(hot_symbols: List[str]):
+    """Background loop polling feeds and hot-ticker news."""
+    while True:
+        try:
+            await ingest_once(hot_symbols)
+            NEWS_STATE["last_ingest"] = datetime.now().isoformat()
+        except Exception as e:
+            logger.error(f"News ingestion failed: {e}")
+        await asyncio.sleep(INGEST_INTERVAL_SECONDS)
+
+
+def _public(article: dict) -> dict:
+    return {k: v for k, v in article.items() if k != "tickers"}
+
+
+def get_articles(ticker: str, limit: int = 10) -> Optional[List[dict]]:
+    """Memory lookup for a ticker (or the market feed). None if nothing is indexed."""
+    if ticker in MARKET_ALIASES:
+        ids = MARKET_FEED
+    else:
+        ids = TICKER_INDEX.get(ticker)
+        if not ids:
+            return None
+    out = []
+    for h in ids:
+        article = ARTICLES.get(h)
+        if article:
+            out.append(_public(article))
+        if len(out) >= limit:
+            break
+    return out
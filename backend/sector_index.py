@@ -0,0 +1,261 @@
+"""Persistent sector/industry index for the NSE universe.
+
+Built in batches by a weekly background job so that /peers can be answered
+from memory without any upstream round-trips.
+"""
+from datetime import datetime, timedelta
+import asyncio
+import csv
+import io
+import json
+import logging
+import math
+import os
+import upstream
+from upstream import Ticker
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Point DATA_DIR at a persistent disk in production; without one every cold start
+# rebuilds the whole index (~2000 symbols, roughly 15 minutes of background traffic)
+DATA_DIR = os.getenv("DATA_DIR", os.path.dirname(__file__))
+INDEX_PATH = os.path.join(DATA_DIR, "sector_index.json")
+NSE_EQUITY_LIST_URL = "https://archives.nseindia.com/content/equities/EQUITY_L.csv"
+REFRESH_INTERVAL = timedelta(days=7)
+# asset_profile + price: two Yahoo requests per symbol, sized to fit one rate-limit burst
+BATCH_SIZE = upstream.batch_size(modules=2)
+BATCH_PAUSE_SECONDS = 2
+BATCH_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 30
+# A rebuild smaller than this fraction of the current index is rejected
+MIN_KEEP_RATIO = 0.8
+
+# Used when the NSE equity list cannot be downloaded
+FALLBACK_UNIVERSE = [
+    "ADANIENT", "ADANIPORTS", "APOLLOHOSP", "ASIANPAINT", "AXISBANK",
+    "BAJAJ-AUTO", "BAJFINANCE", "BAJAJFINSV", "BEL", "BPCL",
+    "BHARTIARTL", "BRITANNIA", "CIPLA", "COALINDIA", "DRREDDY",
+    "EICHERMOT", "GRASIM", "HCLTECH", "HDFCBANK", "HDFCLIFE",
+    "HEROMOTOCO", "HINDALCO", "HINDUNILVR", "ICICIBANK", "ITC",
+    "INDUSINDBK", "INFY", "JSWSTEEL", "KOTAKBANK", "LT",
+    "M&M", "MARUTI", "NTPC", "NESTLEIND", "ONGC",
+    "POWERGRID", "RELIANCE", "SBILIFE", "SBIN", "SUNPHARMA",
+    "TCS", "TATACONSUM", "TATAMOTORS", "TATASTEEL", "TECHM",
+    "TITAN", "ULTRACEMCO", "WIPRO", "IOC",
+    "DABUR", "MARICO", "GODREJCP", "SIEMENS", "ABB", "BHEL",
+    "IDEA", "TTML", "MTNL", "DIVISLAB", "SAIL", "VEDL",
+    "DLF", "GODREJPROP", "OBEROIRLTY", "PRESTIGE", "LICI",
+]
+
+# symbol -> {"name", "sector", "industry", "market_cap"}
+SECTOR_INDEX = {
+    "stocks": {},
+    "by_industry": {},
+    "by_sector": {},
+    "built_at": None,
+    "incomplete": False
+}
+
+
+def _rebuild_lookups(stocks: dict):
+    by_industry, by_sector = {}, {}
+    for sym, info in stocks.items():
+        if info.get("industry"):
+            by_industry.setdefault(info["industry"], []).append(sym)
+        if info.get("sector"):
+            by_sector.setdefault(info["sector"], []).append(sym)
+    SECTOR_INDEX["stocks"] = stocks
+    SECTOR_INDEX["by_industry"] = by_industry
+    SECTOR_INDEX["by_sector"] = by_sector
+
+
+def load_index() -> bool:
+    """Load the persisted index from disk. Returns True if one was found."""
+    try:
+        with open(INDEX_PATH) as f:
+            data = json.load(f)
+        _rebuild_lookups(data.get("stocks", {}))
+        SECTOR_INDEX["built_at"] = data.get("built_at")
+        SECTOR_INDEX["incomplete"] = data.get("incomplete", False)
+        logger.info(f"Loaded sector index with {len(SECTOR_INDEX['stocks'])} stocks")
+        return True
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.error(f"Failed to load sector index: {e}")
+        return False
+
+
+def _save_index():
+    tmp_path = INDEX_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({
+            "built_at": SECTOR_INDEX["built_at"],
+            "incomplete": SECTOR_INDEX["incomplete"],
+            "stocks": SECTOR_INDEX["stocks"]
+        }, f)
+    os.replace(tmp_path, INDEX_PATH)
+
+
+def is_ready() -> bool:
+    return bool(SECTOR_INDEX["stocks"])
+
+
+def is_stale() -> bool:
+    built_at = SECTOR_INDEX["built_at"]
+    if not built_at or SECTOR_INDEX["incomplete"]:
+        return True
+    return datetime.now() - datetime.fromisoformat(built_at) > REFRESH_INTERVAL
+
+
+def fetch_universe() -> List[str]:
+    """Download the NSE equity list, falling back to a built-in blue-chip list."""
+    import requests
+
+    try:
+        resp = requests.get(
+            NSE_EQUITY_LIST_URL,
+            headers={"User-Agent": "Mozilla/5.0"},
+            timeout=15
+        )
+        resp.raise_for_status()
+        reader = csv.DictReader(io.StringIO(resp.text))
+        symbols = []
+        for row in reader:
+            row = {k.strip(): (v or "").strip() for k, v in row.items() if k}
+            if row.get("SERIES") == "EQ" and row.get("SYMBOL"):
+                symbols.append(row["SYMBOL"])
+        if symbols:
+            return symbols
+    except Exception as e:
+        logger.warning(f"NSE equity list download failed, using fallback universe: {e}")
+    return list(FALLBACK_UNIVERSE)
+
+
+def _fetch_batch(symbols: List[str]) -> dict:
+    """Fetch sector, industry and market cap for one batch of symbols."""
+    ns_syms = [f"{s}.NS" for s in symbols]
+    t = Ticker(ns_syms)
+    profiles = t.asset_profile
+    prices = t.price
+
+    out = {}
+    for s, ns in zip(symbols, ns_syms):
+        profile = profiles.get(ns, {}) if isinstance(profiles, dict) else {}
+        p = prices.get(ns, {}) if isinstance(prices, dict) else {}
+        if not isinstance(profile, dict) or not profile.get("sector"):
+            continue
+        p = p if isinstance(p, dict) else {}
+        out[s] = {
+            "name": p.get("longName") or p.get("shortName") or s,
+            "sector": profile.get("sector"),
+            "industry": profile.get("industry"),
+            "market_cap": p.get("marketCap")
+        }
+    return out
+
+
+async def _fetch_batch_with_retry(chunk: List[str], batch_no: int) -> Optional[dict]:
+    """Fetch one batch, backing off while upstream is timing out or the circuit is open."""
+    for attempt in range(BATCH_RETRIES):
+        try:
+            return await upstream.call(
+                _fetch_batch, chunk, priority=upstream.BACKGROUND,
+                cost=upstream.request_cost(chunk, modules=2)
+            )
+        except (upstream.UpstreamUnavailable, upstream.UpstreamTimeout) as e:
+            delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+            logger.warning(f"Sector index batch {batch_no} deferred ({e}); retrying in {delay}s")
+            await asyncio.sleep(delay)
+        except Exception as e:
+            logger.warning(f"Sector index batch {batch_no} failed: {e}")
+            return None
+    return None
+
+
+async def build_index():
+    """Rebuild the whole index in batches and persist it."""
+    universe = await asyncio.to_thread(fetch_universe)
+    logger.info(f"Building sector index for {len(universe)} symbols")
+
+    previous = SECTOR_INDEX["stocks"]
+    stocks = {}
+    failed_batches = 0
+    for i in range(0, len(universe), BATCH_SIZE):
+        chunk = universe[i:i + BATCH_SIZE]
+        batch = await _fetch_batch_with_retry(chunk, i // BATCH_SIZE)
+        if batch is None:
+            # Keep what we knew about this chunk rather than dropping it
+            failed_batches += 1
+            stocks.update({s: previous[s] for s in chunk if s in previous})
+        else:
+            stocks.update(batch)
+        await asyncio.sleep(BATCH_PAUSE_SECONDS)
+
+    if not stocks:
+        logger.error("Sector index build returned no data; keeping previous index")
+        return
+    if len(stocks) < MIN_KEEP_RATIO * len(previous):
+        logger.error(
+            f"Sector index rebuild has {len(stocks)} stocks vs {len(previous)} before; keeping previous index"
+        )
+        SECTOR_INDEX["incomplete"] = True
+        return
+
+    _rebuild_lookups(stocks)
+    SECTOR_INDEX["built_at"] = datetime.now().isoformat()
+    # Failed batches are retried on the next check instead of waiting a week
+    SECTOR_INDEX["incomplete"] = failed_batches > 0
+    try:
+        _save_index()
+    except Exception as e:
+        logger.error(f"Failed to persist sector index: {e}")
+    logger.info(f"Sector index built with {len(stocks)} stocks ({failed_batches} batches failed)")
+
+
+async def refresh_sector_index():
+    """Background job keeping the sector index at most a week old."""
+    load_index()
+    while True:
+        try:
+            if is_stale():
+                await build_index()
+        except Exception as e:
+            logger.error(f"Sector index refresh failed: {e}")
+        await asyncio.sleep(6 * 3600)
+
+
+def _cap_distance(a: Optional[float], b: Optional[float]) -> float:
+    if not a or not b or a <= 0 or b <= 0:
+        return math.inf
+    return abs(math.log(a) - math.log(b))
+
+
+def rank_peers(ticker: str, limit: int = 5) -> Optional[dict]:
+    """Rank peers by industry first, then sector, then market-cap proximity.
+
+    Returns None if the ticker is not in the index.
+    """
+    stocks = SECTOR_INDEX["stocks"]
+    info = stocks.get(ticker)
+    if not info:
+        return None
+
+    same_industry = set(SECTOR_INDEX["by_industry"].get(info.get("industry"), []))
+    candidates = same_industry | set(SECTOR_INDEX["by_sector"].get(info.get("sector"), []))
+    candidates.discard(ticker)
+
+    ranked = sorted(
+        candidates,
+        key=lambda s: (
+            s not in same_industry,
+            _cap_distance(stocks[s].get("market_cap"), info.get("market_cap")),
+            s
+        )
+    )
+    return {
+        "sector": info.get("sector"),
+        "industry": info.get("industry"),
+        "peers": [{"symbol": s, **stocks[s]} for s in ranked[:limit]]
+    }
@@ -0,0 +1,315 @@
+"""Upstream call governor for yahooquery.
+
+Every Yahoo call goes through here instead of the shared default executor:
+a dedicated bounded thread pool, per-call deadlines, interactive-over-
+background priority, a token-bucket rate limit and a circuit breaker.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Priorities, most urgent first: user requests, the market refresh loop, bulk jobs
+INTERACTIVE = 0
+REFRESH = 1
+BACKGROUND = 2
+
+# Below this the slot floors leave no worker a background call can ever take
+MIN_WORKERS = 3
+MAX_WORKERS = int(os.getenv("UPSTREAM_MAX_WORKERS", "8"))
+if MAX_WORKERS < MIN_WORKERS:
+    logger.warning(f"UPSTREAM_MAX_WORKERS={MAX_WORKERS} is below the minimum; using {MIN_WORKERS}")
+    MAX_WORKERS = MIN_WORKERS
+# Slots background work may never take, so interactive requests always get a worker
+INTERACTIVE_RESERVE = max(1, MAX_WORKERS // 4)
+# Free slots that must remain before a call of each priority is admitted:
+# bulk jobs also leave one slot for the market refresh
+_SLOT_FLOOR = {INTERACTIVE: 0, REFRESH: INTERACTIVE_RESERVE, BACKGROUND: INTERACTIVE_RESERVE + 1}
+# Rate limit in Yahoo HTTP requests (one per symbol per quoteSummary module)
+RATE_PER_SECOND = float(os.getenv("UPSTREAM_RATE_PER_SECOND", "5"))
+BURST = int(os.getenv("UPSTREAM_BURST", "50"))
+INTERACTIVE_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "10"))
+BACKGROUND_TIMEOUT = 60.0
+
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 10
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_COOLDOWN_SECONDS = 30
+
+
+class UpstreamError(Exception):
+    """Base class for gateway failures."""
+
+
+class UpstreamTimeout(UpstreamError):
+    """The call missed its deadline (queueing or upstream)."""
+
+
+class UpstreamUnavailable(UpstreamError):
+    """The circuit breaker is open; the call was not attempted."""
+
+
+STATS = {
+    "calls": 0,
+    "errors": 0,
+    "timeouts": 0,
+    "queue_timeouts": 0,
+    "rejected": 0,
+    "in_flight": 0,
+}
+
+
+class _PrioritySlots:
+    """Worker slots handed out lowest-priority-value first."""
+
+    def __init__(self, size: int):
+        self.free = size
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def depth(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    def _wake(self):
+        while self._waiters and self.free > 0:
+            priority, _, fut = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.free <= _SLOT_FLOOR[priority]:
+                return
+            heapq.heappop(self._waiters)
+            self.free -= 1
+            fut.set_result(None)
+
+    async def acquire(self, priority: int):
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._wake()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.free += 1
+        self._wake()
+
+
+class _TokenBucket:
+    """Token bucket served in priority order: only the most urgent waiter may take."""
+
+    POLL_SECONDS = 0.05
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def take(self, cost: int, priority: int):
+        # A cost above capacity could never be satisfied; callers size batches to fit
+        cost = min(max(cost, 1), self.capacity)
+        entry = (priority, next(self._seq))
+        heapq.heappush(self._waiters, entry)
+        try:
+            while True:
+                self._refill()
+                if self._waiters[0] == entry:
+                    if self.tokens >= cost:
+                        heapq.heappop(self._waiters)
+                        self.tokens -= cost
+                        return
+                    await asyncio.sleep(max((cost - self.tokens) / self.rate, self.POLL_SECONDS))
+                else:
+                    await asyncio.sleep(self.POLL_SECONDS)
+        except BaseException:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            raise
+
+
+class _CircuitBreaker:
+    def __init__(self):
+        self.results = deque(maxlen=BREAKER_WINDOW)
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < BREAKER_COOLDOWN_SECONDS:
+                return False
+            self.state = "half_open"
+            self.trial_in_flight = False
+        if self.state == "half_open":
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+        return True
+
+    def record(self, ok: bool):
+        if self.state == "half_open":
+            self.trial_in_flight = False
+            if ok:
+                self.state = "closed"
+                self.results.clear()
+                logger.info("Upstream circuit closed")
+            else:
+                self._open()
+            return
+        self.results.append(ok)
+        failures = self.results.count(False)
+        if len(self.results) >= BREAKER_MIN_CALLS and failures / len(self.results) >= BREAKER_FAILURE_RATIO:
+            self._open()
+
+    def abandon_trial(self):
+        """A half-open trial ended without a verdict (queue timeout or cancellation)."""
+        if self.state == "half_open":
+            self.trial_in_flight = False
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.results.clear()
+        logger.warning(f"Upstream circuit opened for {BREAKER_COOLDOWN_SECONDS}s")
+
+
+def _is_transport_error(exc: BaseException) -> bool:
+    """True for failures that say Yahoo is unhealthy: connection errors, 429 and 5xx.
+
+    Errors the caller caused (a bad period/interval, an unknown symbol) do
+    not count, so client input cannot open the breaker for everyone.
+    """
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    # requests, curl_cffi and socket errors all derive from OSError
+    return isinstance(exc, OSError) or type(exc).__module__.startswith("urllib3")
+
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="upstream")
+_slots = _PrioritySlots(MAX_WORKERS)
+_bucket = _TokenBucket(RATE_PER_SECOND, BURST)
+_breaker = _CircuitBreaker()
+
+
+async def _admit(priority: int, cost: int):
+    await _slots.acquire(priority)
+    try:
+        await _bucket.take(cost, priority)
+    except BaseException:
+        _slots.release()
+        _breaker.abandon_trial()
+        raise
+
+
+async def call(fn, *args, priority: int = INTERACTIVE, timeout: float = None, cost: int = 1, **kwargs):
+    """Run a blocking upstream call under the gateway's limits.
+
+    cost is the number of Yahoo HTTP requests the call makes; see request_cost.
+
+    The deadline covers queueing, rate limiting and the call itself. A call
+    that times out keeps its worker until the thread returns, so a slow
+    upstream cannot oversubscribe the pool.
+    """
+    if timeout is None:
+        timeout = INTERACTIVE_TIMEOUT if priority == INTERACTIVE else BACKGROUND_TIMEOUT
+    if not _breaker.allow():
+        STATS["rejected"] += 1
+        raise UpstreamUnavailable("Upstream circuit breaker is open")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        await asyncio.wait_for(_admit(priority, cost), timeout)
+    except asyncio.TimeoutError:
+        STATS["queue_timeouts"] += 1
+        _breaker.abandon_trial()
+        raise UpstreamTimeout(f"Timed out waiting for an upstream slot after {timeout}s")
+
+    STATS["calls"] += 1
+    STATS["in_flight"] += 1
+
+    def _done(_):
+        STATS["in_flight"] -= 1
+        _slots.release()
+
+    def _notify(f):
+        try:
+            loop.call_soon_threadsafe(_done, f)
+        except RuntimeError:
+            pass  # loop already closed during shutdown
+
+    cf = _executor.submit(fn, *args, **kwargs)
+    cf.add_done_callback(_notify)
+    try:
+        result = await asyncio.wait_for(asyncio.wrap_future(cf), max(deadline - loop.time(), 0))
+    except asyncio.TimeoutError:
+        STATS["timeouts"] += 1
+        _breaker.record(False)
+        raise UpstreamTimeout(f"Upstream call exceeded {timeout}s deadline")
+    except asyncio.CancelledError:
+        _breaker.abandon_trial()
+        raise
+    except Exception as e:
+        STATS["errors"] += 1
+        if _is_transport_error(e):
+            _breaker.record(False)
+        else:
+            _breaker.abandon_trial()
+        raise
+    _breaker.record(True)
+    return result
+
+
+def request_cost(symbols, modules: int = 1) -> int:
+    """Yahoo requests for a multi-symbol call: yahooquery fetches per symbol and module."""
+    count = 1 if isinstance(symbols, str) else len(symbols)
+    return max(1, count * modules)
+
+
+def batch_size(modules: int = 1) -> int:
+    """Largest symbol batch whose cost fits in one token-bucket burst."""
+    return max(1, BURST // modules)
+
+
+def Ticker(*args, **kwargs):
+    """yahooquery.Ticker, imported on first use so pandas stays off the boot path."""
+    from yahooquery import Ticker as _Ticker
+    return _Ticker(*args, **kwargs)
+
+
+def search(*args, **kwargs):
+    from yahooquery import search as _search
+    return _search(*args, **kwargs)
+
+
+def stats() -> dict:
+    return {
+        **STATS,
+        "queue_depth": _slots.depth(),
+        "free_workers": _slots.free,
+        "max_workers": MAX_WORKERS,
+        "circuit": _breaker.state,
+        "tokens": round(_bucket.tokens, 2),
+    }
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
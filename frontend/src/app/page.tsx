@@ -182,8 +182,8 @@ export default function Home() {
   const fetchMarketNews = async () => { 
     try { 
       const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
-      const res = await fetch(`${baseUrl}/api/stock/NIFTY/news`); 
-      if (res.ok) setMarketNews({ articles: await res.json(), sentiment: 'Neutral' }); 
+      const res = await fetch(`${baseUrl}/api/news/market`); 
+      if (res.ok) setMarketNews(await res.json()); 
     } catch (e) {} 
   };
 